@@ -7,6 +7,7 @@ and forwards them to an Arduino (e.g., Mega 2560) via USB Serial.
 
 Setup Instructions:
 1. Install Python dependencies: pip install pyserial
+   (optional: pip install numba to JIT-compile the G-force math)
 2. In Forza Horizon, go to Settings > HUD and Gameplay > Data Out
 3. Set Data Out to ON
 4. Set Data Out IP Address to 127.0.0.1 (localhost)
@@ -20,28 +21,83 @@ Setup Instructions:
 The script will send G-force data like "long,lat,vert\\n" to the Arduino.
 """
 
+import selectors
 import socket
 import struct
 # import requests # Removed
 import serial # Added
 import time
 import math
+import queue
 import sys
+import threading
+
+try:
+    from numba import njit  # Optional, speeds up the per-packet math
+except ImportError:
+    def njit(*args, **kwargs):
+        """Fallback when Numba is not installed: leave the function as plain Python."""
+        return lambda func: func
 
 # Configuration
 FORZA_UDP_IP = "127.0.0.1"
 FORZA_UDP_PORT = 12345
 # SIMULATOR_API_URL = "http://localhost:3002/api/controls"  # Removed
 
-PULL_RATE = 1  # How often to send data to Arduino (in seconds)
+PULL_RATE = 1  # How often to print the status line (in seconds)
+SEND_RATE = 0.03  # Minimum time between G-force writes to the Arduino (in seconds, ~30Hz)
+SMOOTHING_ALPHA = 1.0  # Low-pass filter weight of each new sample (1.0 = off, lower = smoother)
 
 # Serial Configuration for Arduino
 SERIAL_PORT = "COM6"  # !!! IMPORTANT: CHANGE THIS to your Arduino's serial port !!!
                       # Examples: "COM3" on Windows, "/dev/ttyUSB0" or "/dev/ttyACM0" on Linux
 SERIAL_BAUD_RATE = 115200 # Must match the BAUD_RATE in your Arduino sketch
 
-# Forza packet format - 324 bytes total, first 308 bytes are 77 floats
-FORZA_PACKET_FORMAT = "<" + "f" * 77
+# Forza "Car Dash" packets are 324 bytes, little-endian. The fields we use:
+#   bytes  0-15  IsRaceOn, TimestampMS, EngineMaxRpm, EngineIdleRpm (skipped)
+#   bytes 16-19  CurrentEngineRpm
+#   bytes 20-31  AccelerationX/Y/Z (m/s²: lateral, vertical, longitudinal)
+#   bytes 32-43  VelocityX/Y/Z (m/s)
+_TELEM = struct.Struct("<7f")
+_TELEM_OFFSET = 16
+_TELEM_END = _TELEM_OFFSET + _TELEM.size # 44: shortest packet we can parse
+
+_INV_G = 1.0 / 9.81  # 1 / standard gravity
+
+# Serial line sent to the Arduino: "long,lat,vert\n"
+_SERIAL_LINE_FORMAT = b"%.3f,%.3f,%.3f\n"
+
+# Status line printed every PULL_RATE seconds
+_STATUS_LINE_FORMAT = ("%s %s | Speed: %5.1f mph (%6.1f km/h) | RPM: %4.0f | "
+                       "G-Forces: Long:%+5.2f Lat:%+5.2f Vert:%+5.2f\n")
+
+# Neutral G-forces sent while the car is stopped: just gravity
+_IDLE_G_FORCES = (0.0, 0.0, 1.0)
+
+# The car counts as active above 1 km/h; compared squared in m/s so no sqrt is needed
+_ACTIVE_SPEED_MS = 1.0 / 3.6
+_ACTIVE_SPEED_SQ = _ACTIVE_SPEED_MS * _ACTIVE_SPEED_MS
+
+@njit(cache=True, fastmath=True)
+def _compute_g_forces(accel_x, accel_y, accel_z):
+    """Convert Forza accelerations (m/s²) to (longitudinal, lateral, vertical) G-forces."""
+    # Convert to G-forces
+    g_longitudinal = -accel_z * _INV_G       # Negative for correct direction (braking = positive G)
+    g_lateral = accel_x * _INV_G             # Left/right G-forces
+    g_vertical = accel_y * _INV_G + 1.0      # Add 1G for gravity baseline
+    
+    # Apply realistic limits for motion platform safety
+    g_longitudinal = min(3.0, max(-3.0, g_longitudinal))  # ±3G limit
+    g_lateral = min(3.0, max(-3.0, g_lateral))            # ±3G limit
+    g_vertical = min(4.0, max(-1.0, g_vertical))          # -1G to +4G limit
+    return g_longitudinal, g_lateral, g_vertical
+
+@njit(cache=True, fastmath=True)
+def _low_pass(alpha, prev_x, prev_y, prev_z, x, y, z):
+    """Exponential moving average of an (x, y, z) sample, used to reduce G-force jitter."""
+    return (prev_x + alpha * (x - prev_x),
+            prev_y + alpha * (y - prev_y),
+            prev_z + alpha * (z - prev_z))
 
 class ForzaTelemetryProcessor:
     def __init__(self):
@@ -57,13 +113,24 @@ class ForzaTelemetryProcessor:
             print(f"[FIX] Close any other instances of this script or apps using this port and try again")
             raise
             
-        self.sock.settimeout(1.0) # Timeout for UDP socket
+        self.sock.setblocking(False) # Drained without blocking; run() waits on the selector
+        
+        # Register the socket once; each wait is then a single select/epoll call
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.sock, selectors.EVENT_READ)
+        
+        # Reusable receive buffer so packets don't allocate a new bytes object each time
+        self._rxbuf = bytearray(1024)
         
         # Initialize Serial connection to Arduino
         self.ser = None
         try:
             print(f"[SERIAL] Attempting to connect to Arduino on {SERIAL_PORT} at {SERIAL_BAUD_RATE} baud...")
-            self.ser = serial.Serial(SERIAL_PORT, SERIAL_BAUD_RATE, timeout=0.1) # Short write timeout
+            # Short write timeout: a frame the port can't take in time raises SerialTimeoutException
+            # and is dropped by the writer thread (write_timeout=0 would allow silent partial writes)
+            self.ser = serial.Serial(SERIAL_PORT, SERIAL_BAUD_RATE, write_timeout=0.05, rtscts=False, dsrdtr=False)
+            if hasattr(self.ser, "set_buffer_size"): # Windows only
+                self.ser.set_buffer_size(rx_size=4096, tx_size=4096)
             time.sleep(2) # Give Arduino time to reset if DTR is enabled by pyserial
             if self.ser.is_open:
                 print(f"[SERIAL] Successfully connected to Arduino on {SERIAL_PORT}")
@@ -74,171 +141,189 @@ class ForzaTelemetryProcessor:
         except serial.SerialException as e:
             print(f"[ERR] Cannot connect to Arduino on {SERIAL_PORT}: {e}")
             print(f"[FIX] Ensure Arduino is connected, correct COM port is selected, and drivers are installed.")
+            self._selector.close()
             if self.sock: self.sock.close() # Close UDP socket if serial fails
             raise
-
-        # Initialize tracking variables
-        self.prev_velocity = [0.0, 0.0, 0.0] # Retained if needed for future advanced calculations
-        self.prev_time = time.time() # Retained if needed
         
+        # Serial writes run on their own thread so a slow port never stalls UDP receive.
+        # The single-slot queue only ever holds the freshest G-force line.
+        self._send_queue = queue.Queue(maxsize=1)
+        self._serial_ok = True # Result of the most recent serial write
+        self._serial_thread = threading.Thread(target=self._serial_worker, name="serial-writer", daemon=True)
+        self._serial_thread.start()
+
         print(f"[RACE] Forza Horizon Telemetry to Arduino Bridge Started")
         print(f"[NET] Listening for Forza UDP on {FORZA_UDP_IP}:{FORZA_UDP_PORT}")
         # print(f"[API] Forwarding to {SIMULATOR_API_URL}") # Removed
         print(f"[SERIAL] Forwarding G-Force data to Arduino on {SERIAL_PORT}")
         print(f"[GO!] Start driving in Forza to see G-force data!\n")
 
-    def parse_telemetry_packet(self, data):
-        """Parse Forza telemetry UDP packet."""
-        try:
-            if len(data) < 308: # Based on "f"*77
-                # print(f"Warning: Packet too small {len(data)}") # Optional: for debugging
-                return None
-                
-            values = struct.unpack(FORZA_PACKET_FORMAT, data[:308])
-            
-            # Extract telemetry values based on Forza Horizon Car Dash format
-            return {
-                'current_engine_rpm': values[4],     # Current engine RPM
-                'accel_x': values[5],                # Lateral acceleration (m/s²)
-                'accel_y': values[6],                # Vertical acceleration (m/s²) 
-                'accel_z': values[7],                # Longitudinal acceleration (m/s²)
-                'velocity_x': values[8],             # Velocity X (m/s)
-                'velocity_y': values[9],             # Velocity Y (m/s)
-                'velocity_z': values[10],            # Velocity Z (m/s)
-                'speed': math.sqrt(values[8]**2 + values[9]**2 + values[10]**2),  # Speed in m/s
-                'speed_mph': math.sqrt(values[8]**2 + values[9]**2 + values[10]**2) * 2.23694, # Speed in MPH
-            }
-            
-        except (struct.error, IndexError) as e:
-            print(f"[ERR] Error parsing packet: {e}")
-            return None
+    def parse_telemetry_packet(self, data, nbytes):
+        """Parse the first nbytes of a Forza telemetry UDP packet held in data.
 
-    def calculate_g_forces(self, telemetry):
-        """Convert Forza telemetry to G-force values for motion platform."""
-        
-        G_FORCE = 9.81  # Standard gravity
-        
-        # Get raw accelerations from Forza
-        accel_x = telemetry.get('accel_x', 0)    # Lateral (left/right)
-        accel_y = telemetry.get('accel_y', 0)    # Vertical (up/down)
-        accel_z = telemetry.get('accel_z', 0)    # Longitudinal (forward/backward)
-        
-        # Convert to G-forces
-        g_longitudinal = -accel_z / G_FORCE      # Negative for correct direction (braking = positive G)
-        g_lateral = accel_x / G_FORCE            # Left/right G-forces
-        g_vertical = (accel_y / G_FORCE) + 1.0   # Add 1G for gravity baseline
-        
-        # Apply realistic limits for motion platform safety
-        g_longitudinal = max(-3.0, min(3.0, g_longitudinal))  # ±3G limit
-        g_lateral = max(-3.0, min(3.0, g_lateral))            # ±3G limit
-        g_vertical = max(-1.0, min(4.0, g_vertical))          # -1G to +4G limit
-        
-        return {
-            'longitudinal': round(g_longitudinal, 3),
-            'lateral': round(g_lateral, 3),
-            'vertical': round(g_vertical, 3),
-            'timestamp': int(time.time() * 1000)
-        }
+        Returns (rpm, accel_x, accel_y, accel_z, vel_x, vel_y, vel_z) or None.
+        """
+        if nbytes < _TELEM_END:
+            # print(f"Warning: Packet too small {nbytes}") # Optional: for debugging
+            return None
+        return _TELEM.unpack_from(data, _TELEM_OFFSET)
 
     def send_to_arduino(self, g_forces): # Renamed from send_to_simulator
-        """Send G-force data to Arduino via Serial."""
+        """Send a (longitudinal, lateral, vertical) G-force tuple to Arduino via Serial."""
         if not self.ser or not self.ser.is_open:
             # print("[ERR] Serial port not open. Cannot send to Arduino.") # Optional: for debugging
             return False
+        # Format: "long,lat,vert\n"
+        self._queue_latest(_SERIAL_LINE_FORMAT % g_forces)
+        return self._serial_ok
+
+    def _queue_latest(self, item):
+        """Hand an item to the serial writer, replacing any line it hasn't picked up yet."""
         try:
-            # Format: "long,lat,vert\n"
-            data_string = f"{g_forces['longitudinal']},{g_forces['lateral']},{g_forces['vertical']}\\n"
-            self.ser.write(data_string.encode('ascii'))
-            return True
-            
-        # except requests.exceptions.RequestException: # Removed
-        # return False # Removed
-        except serial.SerialTimeoutException:
-            print(f"[WARN] Serial write timeout to {self.ser.port}. Arduino might not be ready.")
-            return False
-        except Exception as e:
-            print(f"[ERR] Error writing to serial port {self.ser.port}: {e}")
-            return False
+            self._send_queue.put_nowait(item)
+        except queue.Full:
+            try:
+                self._send_queue.get_nowait() # Drop the stale line
+            except queue.Empty:
+                pass # Writer took it in the meantime
+            self._send_queue.put_nowait(item) # run() is the only producer, so the slot is free
+
+    def _serial_worker(self):
+        """Write queued G-force lines to the Arduino until a None sentinel arrives."""
+        while True:
+            payload = self._send_queue.get()
+            if payload is None:
+                return
+            # Failures are reported once when they start, not for every dropped frame
+            try:
+                self.ser.write(payload)
+            except serial.SerialTimeoutException:
+                if self._serial_ok:
+                    print(f"[WARN] Serial write timeout to {self.ser.port}, dropping frames. Arduino might not be ready.")
+                self._serial_ok = False
+            except serial.SerialException as e:
+                if self._serial_ok:
+                    print(f"[ERR] Error writing to serial port {self.ser.port}: {e}")
+                self._serial_ok = False
+            else:
+                self._serial_ok = True
 
     def run(self):
         """Main loop to process Forza telemetry and forward to Arduino."""
         
         packet_count = 0
-        last_status_time = time.time()
-        last_data_time = time.time()
+        success = False
+        # Interval timing uses the monotonic clock (immune to wall-clock changes)
+        last_status_time = last_data_time = time.monotonic()
+        last_send_time = 0.0
+        
+        # Bind what the per-packet path and status line use to locals
+        # (LOAD_FAST instead of global/attribute lookups on every packet)
+        sock = self.sock
+        wait_readable = self._selector.select
+        monotonic = time.monotonic
+        recv_into = sock.recv_into
+        rxbuf = self._rxbuf
+        parse = self.parse_telemetry_packet
+        compute_g_forces = _compute_g_forces
+        active_speed_sq = _ACTIVE_SPEED_SQ
+        low_pass = _low_pass
+        alpha = SMOOTHING_ALPHA
+        smoothing = alpha < 1.0
+        smooth_x = smooth_y = smooth_z = 0.0 # Filtered accelerations (m/s²)
+        send = self.send_to_arduino
+        send_rate = SEND_RATE
+        idle_g_forces = _IDLE_G_FORCES
+        status_rate = PULL_RATE
+        status_line_format = _STATUS_LINE_FORMAT
+        sqrt = math.sqrt
+        write_stdout = sys.stdout.write
+        flush_stdout = sys.stdout.flush
         
         print(f"[WAIT] Waiting for Forza Horizon telemetry data...")
         
         try:
             while True:
                 try:
-                    # Receive UDP packet from Forza
-                    data, addr = self.sock.recvfrom(1024)
-                    packet_count += 1
-                    last_data_time = time.time()
+                    # Wait up to 1 second for Forza to send something
+                    ready = wait_readable(1.0)
+                    current_time = monotonic()
+                    if not ready:
+                        # Handle no data gracefully
+                        if current_time - last_data_time > 10.0:
+                            print(f"[WAIT] No telemetry data for 10+ seconds")
+                            print(f"       Make sure Forza Data Out is enabled (Port {FORZA_UDP_PORT})")
+                            last_data_time = current_time
+                        continue
                     
-                    # First packet confirmation
-                    if packet_count == 1:
-                        print(f"[SUCCESS] Connected to Forza! Receiving {len(data)}-byte packets from {addr}")
+                    received = 0
+                    if packet_count == 0:
+                        # First packet confirmation (the only time the sender address is needed)
+                        try:
+                            nbytes, addr = sock.recvfrom_into(rxbuf)
+                        except BlockingIOError:
+                            continue # Spurious wakeup, nothing queued
+                        received = 1
+                        print(f"[SUCCESS] Connected to Forza! Receiving {nbytes}-byte packets from {addr}")
+                    
+                    # Drain every queued packet and keep only the newest one
+                    while True:
+                        try:
+                            nbytes = recv_into(rxbuf)
+                        except BlockingIOError:
+                            break
+                        received += 1
+                    if not received:
+                        continue
+                    packet_count += received
+                    last_data_time = current_time
                     
                     # Parse telemetry data
-                    telemetry = self.parse_telemetry_packet(data)
-                    if not telemetry:
+                    telemetry = parse(rxbuf, nbytes)
+                    if telemetry is None:
                         continue
+                    rpm, accel_x, accel_y, accel_z, vel_x, vel_y, vel_z = telemetry
+                    if smoothing:
+                        # Smooth the raw accelerations so the G-forces are filtered before clamping
+                        accel_x, accel_y, accel_z = smooth_x, smooth_y, smooth_z = low_pass(
+                            alpha, smooth_x, smooth_y, smooth_z, accel_x, accel_y, accel_z)
                     
-                    # Check if car is moving (speed > 1 km/h or engine > idle)
-                    speed_kmh = telemetry.get('speed', 0) * 3.6
-                    rpm = telemetry.get('current_engine_rpm', 0)
-                    is_active = speed_kmh > 1.0 or rpm > 1000
+                    # Check if car is moving (engine > idle or speed > 1 km/h)
+                    is_active = rpm > 1000.0 or vel_x*vel_x + vel_y*vel_y + vel_z*vel_z > active_speed_sq
                     
-                    if is_active:
-                        # Calculate and send real G-forces when moving
-                        g_forces = self.calculate_g_forces(telemetry)
-                        success = self.send_to_arduino(g_forces) # Updated call
-                    else:
-                        # Send neutral G-forces when stopped
-                        g_forces = {
-                            'longitudinal': 0.0,
-                            'lateral': 0.0,
-                            'vertical': 1.0,  # Just gravity
-                            'timestamp': int(time.time() * 1000)
-                        }
-                        success = self.send_to_arduino(g_forces) # Updated call
+                    # Send real G-forces when moving, neutral G-forces when stopped
+                    g_forces = compute_g_forces(accel_x, accel_y, accel_z) if is_active else idle_g_forces
+                    if current_time - last_send_time >= send_rate:
+                        success = send(g_forces)
+                        last_send_time = current_time
                     
                     # Status display every 0.2 seconds (5Hz)
-                    current_time = time.time()
-                    if current_time - last_status_time >= PULL_RATE:
-                        status_icon = "🟢" if success else "🔴"
+                    if current_time - last_status_time >= status_rate:
+                        status_tag = "[OK]" if success else "[ERR]"
                         activity = "ACTIVE" if is_active else "IDLE"
-                        speed_mph_val = telemetry.get('speed_mph', 0) # Get MPH for printing
+                        # Speed is only needed for the status line
+                        speed_kmh = sqrt(vel_x*vel_x + vel_y*vel_y + vel_z*vel_z) * 3.6
+                        speed_mph = speed_kmh * 0.621371
                         
-                        print(f"{status_icon} {activity} | Speed: {speed_mph_val:5.1f} mph ({speed_kmh:6.1f} km/h) | "
-                              f"RPM: {rpm:4.0f} | "
-                              f"G-Forces: Long:{g_forces['longitudinal']:+5.2f} "
-                              f"Lat:{g_forces['lateral']:+5.2f} "
-                              f"Vert:{g_forces['vertical']:+5.2f}")
+                        write_stdout(status_line_format % ((status_tag, activity, speed_mph, speed_kmh, rpm) + g_forces))
+                        flush_stdout()
                         
                         last_status_time = current_time
                         
-                except socket.timeout:
-                    # Handle no data gracefully
-                    current_time = time.time()
-                    if current_time - last_data_time > 10.0:
-                        print(f"[WAIT] No telemetry data for 10+ seconds")
-                        print(f"       Make sure Forza Data Out is enabled (Port {FORZA_UDP_PORT})")
-                        last_data_time = current_time
-                    continue
-                    
-                except Exception as e:
-                    print(f"[ERR] Processing error: {e}")
+                except OSError as e:
+                    print(f"[ERR] UDP receive error: {e}")
                     continue
                     
         except KeyboardInterrupt:
             print(f"\n[STOP] Shutting down telemetry bridge...")
             
         finally:
+            self._selector.close()
             if self.sock:
                 self.sock.close()
+            if self._serial_thread.is_alive():
+                self._queue_latest(None) # Let the writer finish before closing the port
+                self._serial_thread.join(timeout=1.0)
             if self.ser and self.ser.is_open:
                 self.ser.close()
                 print(f"[SERIAL] Serial port {SERIAL_PORT} closed.")
@@ -252,10 +337,13 @@ def main():
     
     try:
         processor = ForzaTelemetryProcessor()
-        processor.run()
     except Exception as e:
         print(f"[FATAL] Failed to start: {e}")
         print(f"[FIX] Make sure port {FORZA_UDP_PORT} is available and try again")
+        return
+    
+    # Errors once the bridge is running are bugs, not startup problems: let them show their traceback
+    processor.run()
 
 if __name__ == "__main__":
     main()